@@ -1,14 +1,14 @@
 import os
 import fcntl
 import socket
-import ipaddress
 from ipaddress import IPv4Address, IPv6Address
+from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
+from functools import lru_cache
 
 from logging import getLogger
 from socket import SocketType
 from typing import (
-    cast,
     Optional as O,
     Union as U,
     Any,
@@ -20,7 +20,9 @@ from typing import (
     Tuple,
     List,
     Dict,
+    Set,
     Iterator,
+    Callable,
 )
 from typing_extensions import Self, TypeAlias
 
@@ -33,7 +35,18 @@ IPAddress: TypeAlias = U[IPv4Address, IPv6Address]
 
 RESOURCE_IDENTS: Dict[str, Type["Resource[Any]"]] = {}
 
-class Resource(Protocol[T]):
+# socket option constants used when binding, bound to module globals
+_SOL_SOCKET = socket.SOL_SOCKET
+_SO_REUSEADDR = socket.SO_REUSEADDR
+_IPPROTO_IPV6 = socket.IPPROTO_IPV6
+
+# properties of the platform and Python build, no need to query them on every call;
+# options that are not available are None
+_SO_REUSEPORT: O[int] = getattr(socket, 'SO_REUSEPORT', None)
+_IPV6_V6ONLY: O[int] = getattr(socket, 'IPV6_V6ONLY', None)
+_HAS_DUALSTACK_V6 = socket.has_dualstack_ipv6()
+
+class Resource(ABC, Generic[T]):
     IDENTS: ClassVar[Tuple[str, ...]] = ()
 
     def __init_subclass__(cls, **kwargs: Any) -> None:
@@ -43,20 +56,24 @@ class Resource(Protocol[T]):
 
     @classmethod
     def decode_spec(cls, ident: str, List: List[str]) -> O[Self]:
-        ...
+        return None
 
     def encode_spec(self) -> Tuple[str, List[str]]:
-        ...
+        raise NotImplementedError(f'{type(self).__name__} can not be encoded as a specification')
 
+    @abstractmethod
     def create(self, reuse: bool = False) -> T:
         ...
 
+    @abstractmethod
     def destroy(self, instance: T) -> None:
         ...
 
+    @abstractmethod
     def decode(self, value: str) -> O[T]:
         ...
 
+    @abstractmethod
     def encode(self, instance: T) -> str:
         ...
 
@@ -64,6 +81,15 @@ class CreatedResources(Protocol):
     def __iter__(self) -> Iterator[Resource[Any]]: ...
     def __getitem__(self, res: Resource[T]) -> T: ...
 
+def set_bind_options(s: SocketType, v6only: O[bool] = None, reuse: bool = False) -> None:
+    if v6only is not None and _IPV6_V6ONLY is not None:
+        s.setsockopt(_IPPROTO_IPV6, _IPV6_V6ONLY, 1 if v6only else 0)
+    if reuse:
+        if _SO_REUSEPORT is None:
+            raise ValueError("can not reuse socket (no SO_REUSEPORT available)")
+        s.setsockopt(_SOL_SOCKET, _SO_REUSEPORT, 1)
+    s.setsockopt(_SOL_SOCKET, _SO_REUSEADDR, 1)
+
 def encode_fd(fd: int) -> str:
     os.set_inheritable(fd, True)
     return str(fd)
@@ -73,11 +99,12 @@ def decode_fd(val: str) -> O[int]:
         fd = int(val)
     except ValueError:
         return None
-    # Check if FD is valid
+    # Check if FD is valid, without allocating another descriptor for it
     try:
-        return os.dup(fd)
+        os.fstat(fd)
     except OSError:
         return None
+    return fd
 
 @dataclass(frozen=True)
 class SocketResource(Generic[AddrT], Resource[SocketType]):
@@ -85,10 +112,24 @@ class SocketResource(Generic[AddrT], Resource[SocketType]):
     type: int
     addr: AddrT
     protocol: int = 0
+    _hash: int = field(init=False, repr=False, compare=False)
+
+    # resources are used as dict keys, so hash once instead of on every lookup;
+    # equal resources always share these fields, so this is consistent with __eq__.
+    # @dataclass would replace this hash in subclasses: those adding fields must re-declare
+    # `__hash__ = SocketResource.__hash__`, others should use @dataclass(eq=False)
+    def __post_init__(self) -> None:
+        object.__setattr__(self, '_hash', hash((self.family, self.type, self.addr, self.protocol)))
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def _sockaddr(self) -> Any:
+        return self.addr
 
     def _bind(self, s: SocketType, reuse: bool = False) -> None:
-        s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        s.bind(cast(Any, self.addr))
+        set_bind_options(s)
+        s.bind(self._sockaddr())
 
     def create(self, reuse: bool = False) -> SocketType:
         s = socket.socket(self.family, self.type, proto=self.protocol)
@@ -111,119 +152,169 @@ class SocketResource(Generic[AddrT], Resource[SocketType]):
             return None
         try:
             s = SocketType(fileno=fd)
-        except:
+        except OSError:
             return None
         return s
 
 IPAddr: TypeAlias = Tuple[O[IPAddress], int]
 
+def parse_ip_address(host: str) -> O[IPAddress]:
+    # cheaper than ipaddress.ip_address(), which tries both parsers in turn
+    try:
+        if ':' in host:
+            return IPv6Address(host)
+        return IPv4Address(host)
+    except ValueError:
+        return None
+
+@lru_cache(maxsize=256)
+def resolve_ip_address(host: str, port: int, type: int, protocol: int) -> IPAddress:
+    for (family, _type, _protocol, _canon, addr_info) in socket.getaddrinfo(host, port, type=type, proto=protocol):
+        if family == socket.AF_INET6:
+            return IPv6Address(addr_info[0])
+        if family == socket.AF_INET:
+            return IPv4Address(addr_info[0])
+    raise ValueError(f'can not resolve {host}')
+
 @dataclass(init=False, frozen=True)
-class IPResource(SocketResource[Tuple[str, int]]):
+class IPResource(SocketResource[IPAddr]):
     dualstack: bool
+    # formatted once, as needed for binding and encoding
+    _host_str: str = field(init=False, repr=False, compare=False)
+
+    __hash__ = SocketResource.__hash__
 
     def __init__(self, type: int, addr: IPAddr, protocol: int = 0, dualstack: O[bool] = None) -> None:
         host, port = addr
 
         if host and not isinstance(host, (IPv4Address, IPv6Address)):
-            for (family, _type, protocol, _canon, addr_info) in socket.getaddrinfo(host, port, type=type, proto=protocol):
-                if family == socket.AF_INET6:
-                    host = IPv6Address(addr_info[0])
-                    break
-                if family == socket.AF_INET:
-                    host = IPv4Address(addr_info[0])
-                    break
-            else:
-                raise ValueError(f'can not resolve {host}')
+            host = parse_ip_address(host) or resolve_ip_address(host, port, type, protocol)
 
-        if isinstance(host, IPv6Address):
-            family = socket.AF_INET6
-            dualstack_val = dualstack or False
-        elif isinstance(host, IPv4Address):
-            family = socket.AF_INET
-            dualstack_val = False
-        else:
-            if socket.has_dualstack_ipv6() and dualstack is not False:
-                family = socket.AF_INET6
-                dualstack_val = True
-            else:
-                family = socket.AF_INET
-                dualstack_val = False
-
-        if dualstack_val and not socket.has_dualstack_ipv6():
+        selected = self.select_family(host, dualstack)
+        if selected is None:
             raise ValueError('dual-stack requested but not available')
+        family, dualstack_val = selected
 
         # needed due @dataclass(frozen=True)
         object.__setattr__(self, 'dualstack', dualstack_val)
-        super().__init__(family, type, (str(host or ''), port), protocol)
+        object.__setattr__(self, '_host_str', str(host) if host else '')
+        super().__init__(family, type, (host, port), protocol)
+
+    # socket family and effective dual-stack setting for a host, None if dual-stack is unavailable
+    @classmethod
+    def select_family(cls, host: O[IPAddress], dualstack: O[bool]) -> O[Tuple[int, bool]]:
+        if isinstance(host, IPv6Address):
+            if dualstack and not _HAS_DUALSTACK_V6:
+                return None
+            return socket.AF_INET6, dualstack or False
+        if isinstance(host, IPv4Address):
+            return socket.AF_INET, False
+        if _HAS_DUALSTACK_V6 and dualstack is not False:
+            return socket.AF_INET6, True
+        return socket.AF_INET, False
 
     @classmethod
     def decode_addr(cls, args: List[str]) -> Tuple[O[IPAddr], O[bool], List[str]]:
         try:
-            host = ipaddress.ip_address(args[0]) if args[0] else None
+            if args[0]:
+                host = parse_ip_address(args[0])
+                if host is None:
+                    return (None, None, args)
+            else:
+                host = None
             port = int(args[1])
-        except (KeyError, ValueError):
-            return (None, args)
+        except (IndexError, ValueError):
+            return (None, None, args)
+        dualstack: O[bool]
         if len(args) > 2 and args[2] in ('single', 'dual'):
             dualstack = args[2] == 'dual'
             ri = 3
         else:
-            dualstack = 0
+            dualstack = None
             ri = 2
-        return ((host, port), args[ri:])
+        return ((host, port), dualstack, args[ri:])
 
     def encode_addr(self) -> List[str]:
-        host, port = self.addr
+        _, port = self.addr
         extra = []
         if self.dualstack is not None:
             extra.append('dual' if self.dualstack else 'single')
-        return [str(host) if host else "", str(port)] + extra
+        return [self._host_str, str(port)] + extra
 
     @classmethod
-    def check_ipv4(cls, addr: IPAddr) -> IPAddr:
+    def match_ipv4(cls, addr: IPAddr) -> O[IPAddr]:
         host, port = addr
         if not host:
             return IPv4Address("0.0.0.0"), port
         if isinstance(host, IPv6Address):
-            raise ValueError("IPv6 address given for IPv4 socket")
+            return None
         return addr
 
     @classmethod
-    def check_ipv6(cls, addr: IPAddr) -> IPAddr:
+    def match_ipv6(cls, addr: IPAddr) -> O[IPAddr]:
         host, port = addr
         if not host:
             return IPv6Address("::"), port
         if isinstance(host, IPv4Address):
-            raise ValueError("IPv4 address given for IPv6 socket")
+            return None
         return addr
 
-    def _bind(self, s: Tuple[str, int], reuse: bool = False) -> None:
-        if self.dualstack is not None and self.family == socket.AF_INET6 and hasattr(socket, 'IPV6_V6ONLY'):
-            s.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_V6ONLY, 0 if self.dualstack else 1)
-        if reuse:
-            if hasattr(socket, "SO_REUSEPORT"):
-                s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
-            else:
-                raise ValueError("can not reuse socket (no SO_REUSEPORT available)")
-        return super()._bind(s, reuse=reuse)
+    @classmethod
+    def check_ipv4(cls, addr: IPAddr) -> IPAddr:
+        checked = cls.match_ipv4(addr)
+        if checked is None:
+            raise ValueError("IPv6 address given for IPv4 socket")
+        return checked
 
-@dataclass(init=False, frozen=True)
-class TCPResource(IPResource):
-    IDENTS = ("tcp", "tcp4", "tcp6")
+    @classmethod
+    def check_ipv6(cls, addr: IPAddr) -> IPAddr:
+        checked = cls.match_ipv6(addr)
+        if checked is None:
+            raise ValueError("IPv4 address given for IPv6 socket")
+        return checked
+
+    def _bind(self, s: SocketType, reuse: bool = False) -> None:
+        v6only = None
+        if self.dualstack is not None and self.family == socket.AF_INET6:
+            v6only = not self.dualstack
+        set_bind_options(s, v6only=v6only, reuse=reuse)
+        s.bind(self._sockaddr())
+
+    def _sockaddr(self) -> Tuple[str, int]:
+        return self._host_str, self.addr[1]
+
+class IPProtocolResource(IPResource):
+    # fixed per subclass, leaving only the address to the constructor
+    SOCKET_TYPE: ClassVar[int]
+    PROTOCOL: ClassVar[int]
+    # address check implied by each ident, if any; returns None on mismatch
+    ADDR_CHECKS: ClassVar[Dict[str, Callable[[IPAddr], O[IPAddr]]]] = {}
 
     def __init__(self, addr: IPAddr, dualstack: O[bool] = None) -> None:
-        super().__init__(socket.SOCK_STREAM, addr, protocol=socket.IPPROTO_TCP, dualstack=dualstack)
+        super().__init__(self.SOCKET_TYPE, addr, protocol=self.PROTOCOL, dualstack=dualstack)
 
     @classmethod
     def decode_spec(cls, ident: str, args: List[str]) -> O[Self]:
         addr, dualstack, args = cls.decode_addr(args)
         if not addr:
             return None
-        if ident == "tcp4":
-            addr = cls.check_ipv4(addr)
-        elif ident == "tcp6":
-            addr = cls.check_ipv6(addr)
+        check = cls.ADDR_CHECKS.get(ident)
+        if check:
+            addr = check(addr)
+            if not addr:
+                return None
+        # the host is already parsed, so this is the only check left that the constructor raises on
+        if cls.select_family(addr[0], dualstack) is None:
+            return None
         return cls(addr, dualstack=dualstack)
 
+@dataclass(init=False, frozen=True, eq=False)
+class TCPResource(IPProtocolResource):
+    IDENTS = ("tcp", "tcp4", "tcp6")
+    SOCKET_TYPE = socket.SOCK_STREAM
+    PROTOCOL = socket.IPPROTO_TCP
+    ADDR_CHECKS = {"tcp4": IPResource.match_ipv4, "tcp6": IPResource.match_ipv6}
+
     def encode_spec(self) -> Tuple[str, List[str]]:
         host, port = self.addr
         if not host:
@@ -234,29 +325,18 @@ class TCPResource(IPResource):
             ident = "tcp6"
         return ident, self.encode_addr()
 
-@dataclass(init=False, frozen=True)
-class UDPResource(IPResource):
+@dataclass(init=False, frozen=True, eq=False)
+class UDPResource(IPProtocolResource):
     IDENTS = ("udp", "udp4", "udp6")
-
-    def __init__(self, addr: IPAddr, dualstack: O[bool] = None) -> None:
-        super().__init__(socket.SOCK_DGRAM, addr, protocol=socket.IPPROTO_UDP, dualstack=dualstack)
-
-    @classmethod
-    def decode_spec(cls, ident: str, args: List[str]) -> O[Self]:
-        addr, dualstack, args = cls.decode_addr(args)
-        if not addr:
-            return None
-        if ident == "udp4":
-            addr = cls.check_ipv4(addr)
-        elif ident == "udp6":
-            addr = cls.check_ipv6(addr)
-        return cls(addr, dualstack=dualstack)
+    SOCKET_TYPE = socket.SOCK_DGRAM
+    PROTOCOL = socket.IPPROTO_UDP
+    ADDR_CHECKS = {"udp4": IPResource.match_ipv4, "udp6": IPResource.match_ipv6}
 
     def encode_spec(self) -> Tuple[str, List[str]]:
         host, port = self.addr
         if not host:
             ident = "udp"
-        if isinstance(host, IPv4Address):
+        elif isinstance(host, IPv4Address):
             ident = "udp4"
         elif isinstance(host, IPv6Address):
             ident = "udp6"
@@ -264,16 +344,16 @@ class UDPResource(IPResource):
 
 def encode_resource_spec(resource: Resource[Any]) -> str:
     ident, args = resource.encode_spec()
-    return f'{ident},{",".join(args)}'
+    return ",".join([ident, *args])
 
-def decode_resource_spec(value: str) -> O[Resource[Any]]:
-    ident, *args = value.split(",")
+def decode_resource_args(ident: str, args: List[str]) -> O[Resource[Any]]:
     if ident not in RESOURCE_IDENTS:
         return None
-    try:
-        return RESOURCE_IDENTS[ident].decode_spec(ident, list(args))
-    except:
-        return None
+    return RESOURCE_IDENTS[ident].decode_spec(ident, args)
+
+def decode_resource_spec(value: str) -> O[Resource[Any]]:
+    ident, *args = value.split(",")
+    return decode_resource_args(ident, args)
 
 def encode_resource_values(resources: CreatedResources) -> str:
     r = []
@@ -281,14 +361,21 @@ def encode_resource_values(resources: CreatedResources) -> str:
         spec = encode_resource_spec(rtype)
         rvalue = resources[rtype]
         value = rtype.encode(rvalue)
-        r.append(f"{value},{spec}")
+        r.append(value + "," + spec)
     return ";".join(r)
 
 def decode_resource_values(values: str) -> CreatedResources:
     r = {}
+    # encoded specs are canonical, so duplicates can be skipped before decoding them
+    seen_specs: Set[str] = set()
     for v in values.split(";"):
-        value, spec = v.split(",", 1)
-        rtype = decode_resource_spec(spec)
+        # split once for both the value and the spec arguments
+        value, ident, *args = v.split(",")
+        spec = v[len(value) + 1:]
+        if spec in seen_specs:
+            continue
+        seen_specs.add(spec)
+        rtype = decode_resource_args(ident, args)
         if not rtype:
             raise ValueError(f'invalid resource specification: {spec}')
         if rtype not in r: